@@ -3,12 +3,15 @@
 Performance benchmarking suite for the style transfer application
 """
 
+import sys
 import time
 import json
-import statistics
 import subprocess
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import jinja2
+import numpy as np
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -16,24 +19,121 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 from selenium.common.exceptions import TimeoutException
 
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+CONFIG_FILE = Path(__file__).with_name("benchmark_config.json")
+TEMPLATE_DIR = Path(__file__).with_name("templates")
+
+# Resolves with the performance.now() timestamp at which the app fired
+# benchReady, whether or not that happened before this script was injected
+READY_JS = """
+    const done = arguments[arguments.length - 1];
+    if (window.__readyAt !== undefined) {
+        done(window.__readyAt);
+    } else {
+        window.addEventListener('benchReady', e => done(e.detail), {once: true});
+    }
+"""
+
+# Clicks the first style and resolves with the milliseconds until the app fired
+# benchModelReady for it (model read from IndexedDB or fetched, session created)
+SELECT_MODEL_JS = """
+    const done = arguments[arguments.length - 1];
+    const start = performance.now();
+    window.addEventListener('benchModelReady', e => done(e.detail - start), {once: true});
+    document.querySelector('.style-option').click();
+"""
+
+# Core Web Vitals LCP cutoffs (seconds): good below the first, poor above the second
+LCP_GOOD = 2.5
+LCP_POOR = 4.0
+
+def summarize(times):
+    """Latency percentiles for a list of timings, computed in one numpy pass"""
+    arr = np.asarray(times, dtype=np.float64)
+    p50, p90, p95, p99 = np.percentile(arr, [50, 90, 95, 99])
+    return {
+        'p50': float(p50),
+        'p90': float(p90),
+        'p95': float(p95),
+        'p99': float(p99),
+        'min': float(arr.min()),
+        'max': float(arr.max()),
+        'n': len(arr)
+    }
+
+def write_json(output_file: Path, data, indent: bool = True):
+    """Write JSON with orjson when available; traces can be hundreds of MB"""
+    if HAS_ORJSON:
+        option = orjson.OPT_SERIALIZE_NUMPY | (orjson.OPT_INDENT_2 if indent else 0)
+        output_file.write_bytes(orjson.dumps(data, option=option))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(data, f, indent=2 if indent else None)
+
 class StyleTransferBenchmark:
     """Automated benchmarking for style transfer performance"""
     
-    def __init__(self, url: str = "http://localhost:8000"):
+    def __init__(self, url: str = "http://localhost:8000", parallel: int = 3, headless: bool = False,
+                 trace: bool = False):
         self.url = url
+        self.parallel = max(1, parallel)
+        self.headless = headless
+        self.trace = trace
         self.results = {}
         
-        # Setup Chrome with WebGPU enabled
+        with open(CONFIG_FILE) as f:
+            self.config = json.load(f)
+        
+        # Main session runs inference, so it keeps WebGPU enabled
+        self.driver = webdriver.Chrome(
+            options=self._build_chrome_options(headless, webgpu=True, trace=trace)
+        )
+        self.wait = WebDriverWait(self.driver, 30)
+        
+        # Read counters straight from DevTools instead of evaluating JS
+        self.driver.execute_cdp_cmd("Performance.enable", {})
+        
+    @classmethod
+    def _build_chrome_options(cls, headless: bool, webgpu: bool = False, trace: bool = False) -> Options:
+        """Build Chrome options with ancillary browser services switched off"""
         chrome_options = Options()
-        chrome_options.add_argument("--enable-unsafe-webgpu")
-        chrome_options.add_argument("--enable-features=WebGPU")
+        
+        if headless:
+            chrome_options.add_argument("--headless=new")
+            
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-renderer-backgrounding")
+        chrome_options.add_argument("--disable-background-timer-throttling")
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-logging")
+        chrome_options.add_argument("--log-level=3")
         chrome_options.add_argument("--disable-web-security")
         chrome_options.add_argument("--allow-running-insecure-content")
+        
+        if webgpu:
+            chrome_options.add_argument("--enable-unsafe-webgpu")
+            chrome_options.add_argument("--enable-features=WebGPU")
+        else:
+            # Load-time only sessions need neither the GPU nor image decoding
+            chrome_options.add_argument("--disable-gpu")
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            
+        if trace:
+            # chromedriver forwards timeline trace events through the performance log
+            chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+            chrome_options.add_experimental_option(
+                "perfLoggingPrefs", {"traceCategories": "devtools.timeline,v8"}
+            )
+            
         chrome_options.add_experimental_option("useAutomationExtension", False)
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.wait = WebDriverWait(self.driver, 30)
+        return chrome_options
         
     def __enter__(self):
         return self
@@ -55,10 +155,10 @@ class StyleTransferBenchmark:
             
             # Run benchmarks
             self.results['initialization'] = self._benchmark_initialization()
+            self.results['web_vitals'] = self._benchmark_web_vitals()
             self.results['model_loading'] = self._benchmark_model_loading()
             self.results['image_processing'] = self._benchmark_image_processing()
             self.results['memory_usage'] = self._benchmark_memory_usage()
-            self.results['browser_compatibility'] = self._test_browser_features()
             
             # Generate report
             self._generate_report()
@@ -74,7 +174,7 @@ class StyleTransferBenchmark:
         
         # Wait for page load
         self.wait.until(
-            EC.presence_of_element_located((By.CLASS_NAME, "app-container"))
+            EC.presence_of_element_located((By.CSS_SELECTOR, ".app-container"))
         )
         
     def _wait_for_initialization(self):
@@ -82,97 +182,191 @@ class StyleTransferBenchmark:
         print("⏳ Waiting for initialization...")
         
         try:
-            # Wait for status to show "Ready"
-            self.wait.until(
-                EC.text_to_be_present_in_element(
-                    (By.ID, "statusText"), 
-                    "Ready"
-                )
-            )
+            self._wait_ready(self.driver)
             print("✅ Application initialized")
             
         except TimeoutException:
             print("⚠️  Initialization timeout - continuing anyway")
             
+    @staticmethod
+    def _wait_ready(driver, timeout: float = 30) -> float:
+        """Seconds from navigation start until the app signalled it is ready"""
+        driver.set_script_timeout(timeout)
+        return driver.execute_async_script(READY_JS) / 1000
+        
+    @classmethod
+    def _time_to_first_model(cls, driver, timeout: float = 30) -> float:
+        """Seconds until the app is ready plus the time to load the first style's model"""
+        ready = cls._wait_ready(driver, timeout)
+        driver.set_script_timeout(timeout)
+        return ready + driver.execute_async_script(SELECT_MODEL_JS) / 1000
+        
+    @staticmethod
+    def _set_cache(driver, enabled: bool):
+        """Explicitly enable or bypass the browser's HTTP cache"""
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setCacheDisabled", {"cacheDisabled": not enabled})
+        
+    def _reload(self, ignore_cache: bool):
+        """Reload the main session's page via CDP and wait for the new document"""
+        old_root = self.driver.find_element(By.TAG_NAME, "html")
+        self.driver.execute_cdp_cmd("Page.reload", {"ignoreCache": ignore_cache})
+        
+        # Page.reload returns before navigating; don't read the old document's state
+        self._poll_wait(30).until(EC.staleness_of(old_root))
+        
+    def _time_single_init(self, url: str) -> float:
+        """Time a cold load of the application and its first model in a fresh browser session"""
+        # Same WebGPU profile as the main session, so cold and warm samples
+        # create the model session on the same execution provider
+        driver = webdriver.Chrome(options=self._build_chrome_options(self.headless, webgpu=True))
+        
+        try:
+            self._set_cache(driver, enabled=False)
+            driver.get(url)
+            
+            try:
+                return self._time_to_first_model(driver)
+                
+            except TimeoutException:
+                return 30.0  # Timeout value
+                
+        finally:
+            driver.quit()
+            
     def _benchmark_initialization(self):
-        """Benchmark application initialization time"""
+        """Benchmark cold and warm time from navigation until the first model is usable"""
         print("📊 Benchmarking initialization...")
         
-        # Reload page and measure initialization time
-        times = []
+        # Cold: each worker drives its own fresh browser, so the waits overlap
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            cold_times = list(executor.map(self._time_single_init, [self.url] * self.parallel))
+            
+        # Warm: a first selection stores the model in the app's IndexedDB cache,
+        # then each reload reads it back from there instead of the network
+        self._set_cache(self.driver, enabled=True)
+        warm_times = []
         
+        try:
+            self.driver.set_script_timeout(120)
+            self.driver.execute_async_script(SELECT_MODEL_JS)
+            
+        except TimeoutException:
+            print("⚠️  First model did not load - warm samples will time out")
+            
         for i in range(3):
-            start_time = time.time()
-            self.driver.refresh()
+            self._reload(ignore_cache=False)
             
             try:
-                self.wait.until(
-                    EC.text_to_be_present_in_element(
-                        (By.ID, "statusText"), 
-                        "Ready"
-                    )
-                )
-                end_time = time.time()
-                times.append(end_time - start_time)
+                warm_times.append(self._time_to_first_model(self.driver))
                 
             except TimeoutException:
-                times.append(30.0)  # Timeout value
+                warm_times.append(30.0)  # Timeout value
                 
         return {
-            'avg_time': statistics.mean(times),
-            'min_time': min(times),
-            'max_time': max(times),
-            'attempts': len(times)
+            'cold': summarize(cold_times),
+            'warm': summarize(warm_times)
+        }
+        
+    def _benchmark_web_vitals(self):
+        """Measure page-load Core Web Vitals with a Lighthouse audit"""
+        print("📊 Benchmarking web vitals...")
+        
+        audits = {
+            'lcp_ms': 'largest-contentful-paint',
+            'fcp_ms': 'first-contentful-paint',
+            'tbt_ms': 'total-blocking-time',
+            'cls': 'cumulative-layout-shift'
         }
         
+        try:
+            completed = subprocess.run(
+                [
+                    "lighthouse", self.url,
+                    "--output=json",
+                    "--output-path=stdout",
+                    "--quiet",
+                    f"--only-audits={','.join(audits.values())}",
+                    "--chrome-flags=--headless --enable-unsafe-webgpu"
+                ],
+                capture_output=True,
+                text=True,
+                timeout=180,
+                check=True
+            )
+            report = json.loads(completed.stdout)
+            
+        except FileNotFoundError:
+            return {'error': 'lighthouse CLI not found (npm install -g lighthouse)'}
+        except (subprocess.SubprocessError, json.JSONDecodeError) as e:
+            return {'error': str(e)}
+            
+        # An audit that errored has no numericValue; keep the others
+        vitals = {}
+        for key, audit in audits.items():
+            result = report.get('audits', {}).get(audit, {})
+            if result.get('numericValue') is not None:
+                vitals[key] = result['numericValue']
+            else:
+                vitals.setdefault('errors', {})[key] = result.get('errorMessage', 'audit did not run')
+                
+        return vitals
+        
     def _benchmark_model_loading(self):
         """Benchmark model loading times"""
         print("📊 Benchmarking model loading...")
         
         model_times = {}
-        style_options = self.driver.find_elements(By.CLASS_NAME, "style-option")
+        self.driver.set_script_timeout(60)
         
-        for option in style_options[:3]:  # Test first 3 models
-            style_name = option.get_attribute("data-style-name")
-            
-            start_time = time.time()
-            option.click()
-            
+        for model in self.config['models'][:3]:  # Test first 3 models
             try:
-                # Wait for model to load (loading class to disappear)
-                WebDriverWait(self.driver, 30).until_not(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, f'[data-style-name="{style_name}"].loading'))
-                )
-                end_time = time.time()
-                model_times[style_name] = end_time - start_time
+                timings = self.driver.execute_async_script("""
+                    const [url, sha256, done] = arguments;
+                    window.__benchLoadModel(url, sha256).then(done, e => done({error: String(e)}));
+                """, model['url'], model['sha256'])
                 
             except TimeoutException:
-                model_times[style_name] = 30.0
+                timings = {'error': 'timeout'}
+                
+            if 'error' in timings:
+                model_times[model['name']] = timings
+            else:
+                model_times[model['name']] = {
+                    'fetch_ms': timings['fetchMs'],
+                    'hash_ms': timings['hashMs'],
+                    'compile_ms': timings['compileMs']
+                }
                 
-            time.sleep(2)  # Brief pause between tests
-            
         return model_times
         
     def _benchmark_image_processing(self):
         """Benchmark image processing performance"""
         print("📊 Benchmarking image processing...")
         
-        # Upload test image
-        self._upload_test_image()
-        
-        # Select a style
-        style_option = self.driver.find_element(By.CLASS_NAME, "style-option")
-        style_option.click()
-        
-        # Wait for model to load
-        time.sleep(3)
+        try:
+            # Upload test image
+            self._upload_test_image()
+            
+            # Select a style
+            style_option = self.driver.find_element(By.CSS_SELECTOR, ".style-option")
+            style_option.click()
+            
+            # The button is enabled once both the image and the model are loaded
+            self._wait_stylize_ready()
+        except TimeoutException:
+            return {'error': 'Image or model did not finish loading'}
         
         # Benchmark stylization
         processing_times = []
         
-        for i in range(3):
-            stylize_btn = self.driver.find_element(By.ID, "stylizeBtn")
+        if self.trace:
+            self.driver.get_log("performance")  # Drop events recorded before the runs
             
+        # The button node persists across runs, so look it up once
+        stylize_btn = self.driver.find_element(By.ID, "stylizeBtn")
+        
+        for i in range(3):
             start_time = time.time()
             stylize_btn.click()
             
@@ -187,61 +381,76 @@ class StyleTransferBenchmark:
             except TimeoutException:
                 processing_times.append(60.0)
                 
-            time.sleep(2)
+            # Wait until the next run can be started
+            self._poll_wait(30).until(EC.element_to_be_clickable(stylize_btn))
             
-        return {
-            'avg_processing_time': statistics.mean(processing_times),
-            'min_processing_time': min(processing_times),
-            'max_processing_time': max(processing_times)
-        }
+        if self.trace:
+            self._save_trace(Path("benchmark_trace.json"))
+            
+        return summarize(processing_times)
         
     def _benchmark_memory_usage(self):
         """Benchmark memory usage"""
         print("📊 Benchmarking memory usage...")
         
-        # Execute JavaScript to get memory info
         try:
-            memory_info = self.driver.execute_script("""
-                if (performance.memory) {
-                    return {
-                        usedJSHeapSize: performance.memory.usedJSHeapSize,
-                        totalJSHeapSize: performance.memory.totalJSHeapSize,
-                        jsHeapSizeLimit: performance.memory.jsHeapSizeLimit
-                    };
-                }
-                return null;
-            """)
-            
-            if memory_info:
-                return {
-                    'used_heap_mb': memory_info['usedJSHeapSize'] / 1024 / 1024,
-                    'total_heap_mb': memory_info['totalJSHeapSize'] / 1024 / 1024,
-                    'heap_limit_mb': memory_info['jsHeapSizeLimit'] / 1024 / 1024
-                }
-            else:
-                return {'error': 'Memory API not available'}
+            response = self.driver.execute_cdp_cmd("Performance.getMetrics", {})
+            metrics = {m['name']: m['value'] for m in response['metrics']}
+            
+            return {
+                'used_heap_mb': metrics['JSHeapUsedSize'] / 1024 / 1024,
+                'total_heap_mb': metrics['JSHeapTotalSize'] / 1024 / 1024,
+                'dom_nodes': int(metrics.get('Nodes', 0)),
+                'layout_count': int(metrics.get('LayoutCount', 0))
+            }
                 
         except Exception as e:
             return {'error': str(e)}
             
-    def _test_browser_features(self):
-        """Test browser feature compatibility"""
+    def _save_trace(self, output_file: Path):
+        """Dump timeline trace events captured since the last drain"""
+        events = []
+        for entry in self.driver.get_log("performance"):
+            message = json.loads(entry['message'])['message']
+            if message['method'] == 'Tracing.dataCollected':
+                events.append(message['params'])
+                
+        write_json(output_file, {'traceEvents': events}, indent=False)
+            
+        print(f"🧵 Trace saved to: {output_file} ({len(events)} events)")
+        
+    def _collect_snapshot(self):
+        """Collect all read-only page probes in a single round-trip"""
         print("📊 Testing browser compatibility...")
         
-        features = self.driver.execute_script("""
+        snapshot = self.driver.execute_script("""
+            const nav = performance.getEntriesByType('navigation')[0];
             return {
-                webassembly: typeof WebAssembly !== 'undefined',
-                webgpu: 'gpu' in navigator,
-                serviceworker: 'serviceWorker' in navigator,
-                webworkers: typeof Worker !== 'undefined',
-                indexeddb: 'indexedDB' in window,
-                filereader: typeof FileReader !== 'undefined',
-                mediadevices: navigator.mediaDevices && navigator.mediaDevices.getUserMedia
+                memory: performance.memory ? {
+                    jsHeapSizeLimit: performance.memory.jsHeapSizeLimit
+                } : null,
+                features: {
+                    webassembly: typeof WebAssembly !== 'undefined',
+                    webgpu: 'gpu' in navigator,
+                    serviceworker: 'serviceWorker' in navigator,
+                    webworkers: typeof Worker !== 'undefined',
+                    indexeddb: 'indexedDB' in window,
+                    filereader: typeof FileReader !== 'undefined',
+                    mediadevices: !!(navigator.mediaDevices && navigator.mediaDevices.getUserMedia)
+                },
+                timing: nav ? nav.toJSON() : null
             };
         """)
         
-        return features
+        self.results['browser_compatibility'] = snapshot['features']
         
+        if snapshot['timing']:
+            self.results['navigation_timing'] = snapshot['timing']
+            
+        memory = self.results.get('memory_usage')
+        if snapshot['memory'] and memory and 'error' not in memory:
+            memory['heap_limit_mb'] = snapshot['memory']['jsHeapSizeLimit'] / 1024 / 1024
+            
     def _upload_test_image(self):
         """Upload a test image for benchmarking"""
         # Create a simple test image using canvas
@@ -270,10 +479,28 @@ class StyleTransferBenchmark:
         """)
         
         # Wait for image to be processed
-        time.sleep(2)
+        self._wait_image_loaded()
+        
+    def _poll_wait(self, timeout: float) -> WebDriverWait:
+        """WebDriverWait with a fine poll interval so fast completions aren't padded"""
+        return WebDriverWait(self.driver, timeout, poll_frequency=0.05)
+        
+    def _wait_stylize_ready(self, timeout: float = 30):
+        """Wait until the stylize button can be clicked"""
+        self._poll_wait(timeout).until(
+            EC.element_to_be_clickable((By.ID, "stylizeBtn"))
+        )
+        
+    def _wait_image_loaded(self, timeout: float = 30):
+        """Wait until the uploaded image has been drawn into the original container"""
+        self._poll_wait(timeout).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, "#originalContainer canvas"))
+        )
         
     def _generate_report(self):
         """Generate detailed benchmark report"""
+        self._collect_snapshot()
+        
         print("\n📋 Benchmark Results")
         print("=" * 30)
         
@@ -281,106 +508,82 @@ class StyleTransferBenchmark:
         for category, data in self.results.items():
             print(f"\n🔍 {category.replace('_', ' ').title()}:")
             if isinstance(data, dict):
-                for key, value in data.items():
-                    if isinstance(value, float):
-                        print(f"   {key}: {value:.2f}")
-                    else:
-                        print(f"   {key}: {value}")
+                self._print_fields(data, indent="   ")
             else:
                 print(f"   {data}")
                 
         # Save to JSON file
         output_file = Path("benchmark_results.json")
-        with open(output_file, 'w') as f:
-            json.dump(self.results, f, indent=2)
+        write_json(output_file, self.results)
             
         print(f"\n💾 Results saved to: {output_file}")
         
         # Generate HTML report
         self._generate_html_report()
         
+    def _print_fields(self, data: dict, indent: str):
+        """Print a (possibly nested) result dict"""
+        for key, value in data.items():
+            if isinstance(value, dict):
+                print(f"{indent}{key}:")
+                self._print_fields(value, indent + "   ")
+            elif isinstance(value, float):
+                print(f"{indent}{key}: {value:.2f}")
+            else:
+                print(f"{indent}{key}: {value}")
+                
     def _generate_html_report(self):
         """Generate HTML benchmark report"""
-        html_content = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <title>Style Transfer Benchmark Report</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 40px; }}
-                .metric {{ margin: 20px 0; padding: 15px; background: #f5f5f5; border-radius: 5px; }}
-                .good {{ border-left: 5px solid #4CAF50; }}
-                .warning {{ border-left: 5px solid #FF9800; }}
-                .error {{ border-left: 5px solid #F44336; }}
-                table {{ border-collapse: collapse; width: 100%; }}
-                th, td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-                th {{ background-color: #f2f2f2; }}
-            </style>
-        </head>
-        <body>
-            <h1>🎨 Style Transfer Benchmark Report</h1>
-            <p>Generated on: {time.strftime('%Y-%m-%d %H:%M:%S')}</p>
-            
-            <h2>Performance Metrics</h2>
-            {self._format_metrics_html()}
-            
-            <h2>Browser Compatibility</h2>
-            {self._format_compatibility_html()}
-            
-            <h2>Recommendations</h2>
-            {self._generate_recommendations_html()}
-        </body>
-        </html>
-        """
-        
-        with open("benchmark_report.html", 'w') as f:
-            f.write(html_content)
+        env = jinja2.Environment(loader=jinja2.FileSystemLoader(TEMPLATE_DIR), autoescape=True)
+        html_content = env.get_template("report.html.j2").render(
+            results=self.results,
+            metrics=self._metric_rows(),
+            recommendations=self._recommendations(),
+            ts=time.strftime('%Y-%m-%d %H:%M:%S')
+        )
+        
+        Path("benchmark_report.html").write_text(html_content)
             
         print("📊 HTML report generated: benchmark_report.html")
         
-    def _format_metrics_html(self):
-        """Format performance metrics as HTML"""
-        html = "<table><tr><th>Metric</th><th>Value</th><th>Status</th></tr>"
+    @staticmethod
+    def _grade(value: float, good: float, poor: float) -> str:
+        """Map a lower-is-better value onto good/warning/error"""
+        return "good" if value < good else "warning" if value < poor else "error"
+        
+    def _metric_rows(self):
+        """Graded performance metrics for the report table"""
+        rows = []
         
+        if 'web_vitals' in self.results and 'lcp_ms' in self.results['web_vitals']:
+            lcp = self.results['web_vitals']['lcp_ms'] / 1000
+            rows.append({'name': "Largest Contentful Paint", 'value': f"{lcp:.2f}s",
+                         'status': self._grade(lcp, LCP_GOOD, LCP_POOR)})
+            
         if 'initialization' in self.results:
-            init_time = self.results['initialization']['avg_time']
-            status = "good" if init_time < 5 else "warning" if init_time < 10 else "error"
-            html += f"<tr><td>Initialization Time</td><td>{init_time:.2f}s</td><td class='{status}'>{status.title()}</td></tr>"
+            for label, key in (("Cold", 'cold'), ("Warm", 'warm')):
+                init_time = self.results['initialization'][key]['p95']
+                rows.append({'name': f"{label} Time to First Model (p95)", 'value': f"{init_time:.2f}s",
+                             'status': self._grade(init_time, LCP_GOOD, LCP_POOR)})
             
-        if 'image_processing' in self.results:
-            proc_time = self.results['image_processing']['avg_processing_time']
-            status = "good" if proc_time < 5 else "warning" if proc_time < 15 else "error"
-            html += f"<tr><td>Processing Time</td><td>{proc_time:.2f}s</td><td class='{status}'>{status.title()}</td></tr>"
+        if 'image_processing' in self.results and 'p95' in self.results['image_processing']:
+            proc_time = self.results['image_processing']['p95']
+            rows.append({'name': "Processing Time (p95)", 'value': f"{proc_time:.2f}s",
+                         'status': self._grade(proc_time, 5, 15)})
             
         if 'memory_usage' in self.results and 'used_heap_mb' in self.results['memory_usage']:
             memory = self.results['memory_usage']['used_heap_mb']
-            status = "good" if memory < 100 else "warning" if memory < 200 else "error"
-            html += f"<tr><td>Memory Usage</td><td>{memory:.1f} MB</td><td class='{status}'>{status.title()}</td></tr>"
-            
-        html += "</table>"
-        return html
-        
-    def _format_compatibility_html(self):
-        """Format browser compatibility as HTML"""
-        if 'browser_compatibility' not in self.results:
-            return "<p>No compatibility data available</p>"
+            rows.append({'name': "Memory Usage", 'value': f"{memory:.1f} MB",
+                         'status': self._grade(memory, 100, 200)})
             
-        features = self.results['browser_compatibility']
-        html = "<table><tr><th>Feature</th><th>Supported</th></tr>"
+        return rows
         
-        for feature, supported in features.items():
-            status = "✅" if supported else "❌"
-            html += f"<tr><td>{feature.replace('_', ' ').title()}</td><td>{status}</td></tr>"
-            
-        html += "</table>"
-        return html
-        
-    def _generate_recommendations_html(self):
+    def _recommendations(self):
         """Generate performance recommendations"""
         recommendations = []
         
         if 'initialization' in self.results:
-            if self.results['initialization']['avg_time'] > 10:
+            if self.results['initialization']['cold']['p95'] > 10:
                 recommendations.append("Consider optimizing WebAssembly module size")
                 
         if 'memory_usage' in self.results and 'used_heap_mb' in self.results['memory_usage']:
@@ -390,12 +593,7 @@ class StyleTransferBenchmark:
         if not recommendations:
             recommendations.append("Performance looks good! 🎉")
             
-        html = "<ul>"
-        for rec in recommendations:
-            html += f"<li>{rec}</li>"
-        html += "</ul>"
-        
-        return html
+        return recommendations
 
 def main():
     import argparse
@@ -403,6 +601,8 @@ def main():
     parser = argparse.ArgumentParser(description="Run style transfer benchmarks")
     parser.add_argument("--url", default="http://localhost:8000", help="Application URL")
     parser.add_argument("--headless", action="store_true", help="Run in headless mode")
+    parser.add_argument("--parallel", type=int, default=3, help="Concurrent browser sessions for initialization timing")
+    parser.add_argument("--trace", action="store_true", help="Capture a DevTools timeline trace of stylization")
     
     args = parser.parse_args()
     
@@ -410,7 +610,8 @@ def main():
     print("=" * 40)
     
     try:
-        with StyleTransferBenchmark(args.url) as benchmark:
+        with StyleTransferBenchmark(args.url, parallel=args.parallel, headless=args.headless,
+                                    trace=args.trace) as benchmark:
             benchmark.run_full_benchmark_suite()
             
     except KeyboardInterrupt:
@@ -5,8 +5,11 @@ Advanced model conversion utilities for style transfer models
 
 import os
 import sys
+import zlib
+import tempfile
 import argparse
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 try:
@@ -31,8 +34,9 @@ except ImportError:
 class ModelConverter:
     """Convert various model formats to optimized ONNX for WebAssembly"""
     
-    def __init__(self, target_size: int = 512):
+    def __init__(self, target_size: int = 512, fp16: bool = False):
         self.target_size = target_size
+        self.fp16 = fp16
         self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
         
     def convert_pytorch_to_onnx(self, model_path: str, output_path: str):
@@ -49,22 +53,26 @@ class ModelConverter:
         # Create dummy input
         dummy_input = torch.randn(1, 3, self.target_size, self.target_size, device=self.device)
         
-        # Export to ONNX
+        # Export a shape-frozen graph so ORT can constant-fold the
+        # reshape/transpose chains; opset 17 keeps norm layers as single ops
         torch.onnx.export(
             model,
             dummy_input,
             output_path,
             export_params=True,
-            opset_version=13,
+            opset_version=17,
             do_constant_folding=True,
+            training=torch.onnx.TrainingMode.EVAL,
             input_names=['input'],
-            output_names=['output'],
-            dynamic_axes={
-                'input': {0: 'batch_size'},
-                'output': {0: 'batch_size'}
-            }
+            output_names=['output']
         )
         
+        # Annotate static shapes for downstream optimizers
+        onnx.shape_inference.infer_shapes_path(output_path, output_path)
+        
+        if self.fp16:
+            self._convert_to_fp16(output_path)
+            
         # Verify the conversion
         self._verify_onnx_model(output_path, dummy_input.cpu().numpy())
         print(f"✅ PyTorch conversion complete: {output_path}")
@@ -91,74 +99,132 @@ class ModelConverter:
         """Optimize ONNX model specifically for WebAssembly deployment"""
         print(f"🔧 Optimizing for web deployment: {input_path}")
         
-        import onnxoptimizer
-        
         # Load model
         model = onnx.load(input_path)
         
-        # Web-specific optimization passes
-        optimization_passes = [
-            'eliminate_deadend',
-            'eliminate_identity', 
-            'eliminate_nop_dropout',
-            'eliminate_nop_pad',
-            'eliminate_unused_initializer',
-            'extract_constant_to_initializer',
-            'fuse_add_bias_into_conv',
-            'fuse_bn_into_conv',
-            'fuse_consecutive_squeezes',
-            'fuse_consecutive_transposes',
-            'fuse_pad_into_conv',
-            'fuse_transpose_into_gemm',
-            'lift_lexical_references',
-        ]
-        
-        # Apply optimizations
-        optimized_model = onnxoptimizer.optimize(model, optimization_passes)
-        
-        # Additional web optimizations
-        self._quantize_for_web(optimized_model)
-        
-        # Save optimized model
-        onnx.save(optimized_model, output_path)
+        # onnxoptimizer only covers the structural passes ORT doesn't perform
+        try:
+            import onnxoptimizer
+            model = onnxoptimizer.optimize(model, [
+                'eliminate_deadend',
+                'eliminate_unused_initializer',
+                'extract_constant_to_initializer',
+                'lift_lexical_references',
+            ])
+        except ImportError:
+            print("⚠️  onnxoptimizer not available - skipping structural passes")
+            
+        # Let ORT's graph transformers fuse Conv+Add+activation chains and
+        # write the result out. EXTENDED rather than ALL: the layout-specific
+        # CPU kernels that ALL introduces don't exist in ORT-Web.
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+        session_options.optimized_model_filepath = output_path
+        
+        # Move weights into a single sidecar file so they can be streamed
+        # separately from the graph (and stay clear of the 2 GB protobuf limit)
+        weights_path = Path(output_path).with_name(Path(output_path).name + '.data')
+        session_options.add_session_config_entry(
+            'session.optimized_model_external_initializers_file_name', weights_path.name
+        )
+        session_options.add_session_config_entry(
+            'session.optimized_model_external_initializers_min_size_in_bytes', '1024'
+        )
+        ort.InferenceSession(
+            model.SerializeToString(),
+            sess_options=session_options,
+            providers=['CPUExecutionProvider']
+        )
+        
+        # Quantize the pre-ORT graph: in the ORT output Conv+Relu are already
+        # FusedConv, which op_types_to_quantize would skip
+        int8_path = str(Path(output_path).with_suffix('.int8.onnx'))
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            pre_ort_path = os.path.join(tmp_dir, 'pre_ort.onnx')
+            onnx.save(model, pre_ort_path)
+            quantized = self._quantize_for_web(pre_ort_path, int8_path)
         
         # Report size reduction
         original_size = Path(input_path).stat().st_size
         optimized_size = Path(output_path).stat().st_size
+        if weights_path.exists():
+            optimized_size += weights_path.stat().st_size
         reduction = (1 - optimized_size / original_size) * 100
         
         print(f"✅ Web optimization complete:")
         print(f"   Size reduction: {reduction:.1f}%")
-        print(f"   Final size: {optimized_size / 1024 / 1024:.1f} MB")
+        print(f"   Final size (FP32): {optimized_size / 1024 / 1024:.1f} MB (graph + {weights_path.name})")
+        if quantized:
+            int8_size = Path(int8_path).stat().st_size
+            print(f"   Final size (INT8): {int8_size / 1024 / 1024:.1f} MB -> {int8_path}")
         
-    def _quantize_for_web(self, model):
+    def _quantize_for_web(self, in_path: str, out_path: str) -> bool:
         """Apply quantization optimizations for web deployment"""
         try:
             from onnxruntime.quantization import quantize_dynamic, QuantType
             
-            # Dynamic quantization to reduce model size
-            # Note: This is a simplified example - real implementation would be more sophisticated
-            pass
-            
         except ImportError:
             print("⚠️  ONNX quantization tools not available")
+            return False
+            
+        # Dynamic INT8 weight quantization; reduce_range keeps the
+        # activations in the range XNNPACK's u8 kernels expect
+        quantize_dynamic(
+            in_path,
+            out_path,
+            weight_type=QuantType.QUInt8,
+            op_types_to_quantize=['Conv', 'MatMul', 'Gemm'],
+            per_channel=True,
+            reduce_range=True
+        )
+        return True
+            
+    def _convert_to_fp16(self, model_path: str):
+        """Rewrite weights and activations as float16 for WebGPU, keeping FP32 I/O"""
+        try:
+            from onnxconverter_common import float16
             
+        except ImportError:
+            print("⚠️  onnxconverter-common not available - keeping FP32 model")
+            return
+            
+        model = onnx.load(model_path)
+        model = float16.convert_float_to_float16(model, keep_io_types=True, disable_shape_infer=False)
+        onnx.save(model, model_path)
+        print(f"✅ Converted to FP16: {model_path}")
+        
     def _verify_onnx_model(self, model_path: str, test_input: np.ndarray):
         """Verify ONNX model works correctly"""
         try:
+            use_cuda = (
+                self.device.type == 'cuda'
+                and 'CUDAExecutionProvider' in ort.get_available_providers()
+            )
+            providers = ['CUDAExecutionProvider', 'CPUExecutionProvider'] if use_cuda else ['CPUExecutionProvider']
+            
             # Create inference session
-            session = ort.InferenceSession(model_path)
+            session = ort.InferenceSession(model_path, providers=providers)
             
             # Get input/output names
             input_name = session.get_inputs()[0].name
             output_name = session.get_outputs()[0].name
             
             # Run inference
-            result = session.run([output_name], {input_name: test_input})
+            if use_cuda:
+                # Bind device buffers directly so the input isn't copied per call
+                x = torch.from_numpy(test_input).cuda()
+                io_binding = session.io_binding()
+                io_binding.bind_input(input_name, 'cuda', 0, test_input.dtype, tuple(x.shape), x.data_ptr())
+                io_binding.bind_output(output_name, 'cuda')
+                session.run_with_iobinding(io_binding)
+                output_shape = io_binding.get_outputs()[0].shape()
+            else:
+                result = session.run([output_name], {input_name: test_input})
+                output_shape = result[0].shape
             
             print(f"✅ Model verification passed")
             print(f"   Input shape: {test_input.shape}")
-            print(f"   Output shape: {result[0].shape}")
+            print(f"   Output shape: {output_shape}")
             
         except Exception as e:
             print(f"❌ Model verification failed: {e}")
@@ -172,49 +238,65 @@ class ModelConverter:
             
         print("🎨 Creating test style transfer models...")
         
-        class SimpleStyleTransfer(torch.nn.Module):
-            """Simple CNN for testing"""
-            def __init__(self):
-                super().__init__()
-                self.conv1 = torch.nn.Conv2d(3, 32, 3, padding=1)
-                self.conv2 = torch.nn.Conv2d(32, 32, 3, padding=1)
-                self.conv3 = torch.nn.Conv2d(32, 3, 3, padding=1)
-                self.relu = torch.nn.ReLU()
-                self.tanh = torch.nn.Tanh()
-                
-            def forward(self, x):
-                x = self.relu(self.conv1(x))
-                x = self.relu(self.conv2(x))
-                x = self.tanh(self.conv3(x))
-                return x
-        
         # Create and save test models
         styles = ['vangogh', 'picasso', 'monet', 'cyberpunk', 'ukiyo']
         
-        for style in styles:
-            model = SimpleStyleTransfer()
-            model.eval()
-            
-            # Create random weights to simulate different styles
-            torch.manual_seed(hash(style) % 2**31)
-            for param in model.parameters():
-                param.data = torch.randn_like(param.data) * 0.1
-                
-            output_path = output_dir / f"{style}-style.onnx"
-            
-            # Export to ONNX
-            dummy_input = torch.randn(1, 3, self.target_size, self.target_size)
-            torch.onnx.export(
-                model,
-                dummy_input,
-                str(output_path),
-                export_params=True,
-                opset_version=13,
-                input_names=['input'],
-                output_names=['output']
-            )
+        # Exports are CPU-bound and independent, so run one per process
+        with ProcessPoolExecutor() as executor:
+            for output_path in executor.map(
+                _export_test_model,
+                styles,
+                [self.target_size] * len(styles),
+                [output_dir] * len(styles)
+            ):
+                print(f"✅ Created test model: {output_path}")
+
+def _export_test_model(style: str, target_size: int, output_dir: Path) -> Path:
+    """Build and export a single randomly initialised test model"""
+    
+    class SimpleStyleTransfer(torch.nn.Module):
+        """Simple CNN for testing"""
+        def __init__(self):
+            super().__init__()
+            self.conv1 = torch.nn.Conv2d(3, 32, 3, padding=1)
+            self.conv2 = torch.nn.Conv2d(32, 32, 3, padding=1)
+            self.conv3 = torch.nn.Conv2d(32, 3, 3, padding=1)
+            self.relu = torch.nn.ReLU()
+            self.tanh = torch.nn.Tanh()
             
-            print(f"✅ Created test model: {output_path}")
+        def forward(self, x):
+            x = self.relu(self.conv1(x))
+            x = self.relu(self.conv2(x))
+            x = self.tanh(self.conv3(x))
+            return x
+    
+    model = SimpleStyleTransfer()
+    model.eval()
+    
+    # Create random weights to simulate different styles. crc32 rather than
+    # hash() keeps the seed stable across worker processes.
+    torch.manual_seed(zlib.crc32(style.encode()))
+    with torch.no_grad():
+        num_params = sum(p.numel() for p in model.parameters())
+        torch.nn.utils.vector_to_parameters(
+            torch.randn(num_params) * 0.1, model.parameters()
+        )
+        
+    output_path = output_dir / f"{style}-style.onnx"
+    
+    # Export to ONNX
+    dummy_input = torch.randn(1, 3, target_size, target_size)
+    torch.onnx.export(
+        model,
+        dummy_input,
+        str(output_path),
+        export_params=True,
+        opset_version=13,
+        input_names=['input'],
+        output_names=['output']
+    )
+    
+    return output_path
 
 def main():
     parser = argparse.ArgumentParser(description="Convert ML models to web-optimized ONNX")
@@ -223,11 +305,12 @@ def main():
     parser.add_argument("--format", choices=['pytorch', 'tensorflow', 'onnx'], required=True, help="Input format")
     parser.add_argument("--size", type=int, default=512, help="Target input size")
     parser.add_argument("--optimize", action='store_true', help="Apply web optimizations")
+    parser.add_argument("--fp16", action='store_true', help="Convert exported PyTorch models to float16")
     parser.add_argument("--create-test-models", action='store_true', help="Create test models")
     
     args = parser.parse_args()
     
-    converter = ModelConverter(args.size)
+    converter = ModelConverter(args.size, fp16=args.fp16)
     
     if args.create_test_models:
         output_dir = Path(args.output)
@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Shared model download helpers for the tools/download_*.py scripts.
+
+Each script describes its models as a dict of model_id -> info, where info has
+either a "url" or a list of "urls" to try in order, plus the metadata written
+to styles.json ("name", "size", "description" and optionally "category").
+By default a model is saved as "<model_id>.onnx"; set "filename" to override,
+and set "sha256" to have the download checked against a known digest.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Every model download is in flight at once (up to the connection pool
+# size), so total time tracks the slowest file rather than the sum
+MAX_CONCURRENT_DOWNLOADS = 16
+
+# One pooled keep-alive session, so repeat requests to the same host skip
+# the TCP/TLS handshake; transient gateway errors are retried with backoff
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=MAX_CONCURRENT_DOWNLOADS,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+))
+
+# 1 MiB reads keep per-chunk Python overhead negligible on multi-MB models
+CHUNK_SIZE = 1 << 20
+
+# Interrupted transfers resume with a Range request rather than restarting
+MAX_ATTEMPTS = 3
+
+# Per-directory record of where each model came from, its ETag and its
+# SHA-256, so repeat runs can revalidate with a HEAD instead of a full
+# download and verification doesn't need to re-read the file
+ETAGS_FILENAME = ".etags.json"
+
+# Progress is redrawn on a timer, not per chunk
+PROGRESS_INTERVAL = 0.25
+
+# Downloads run concurrently, so serialize console output
+print_lock = threading.Lock()
+etags_lock = threading.Lock()
+
+class ProgressBoard:
+    """Single-line progress display for all active downloads, drawn from a background thread"""
+
+    def __init__(self, interval=PROGRESS_INTERVAL):
+        self.interval = interval
+        self.tasks = {}  # filename -> [downloaded, total]
+        self._width = 0
+        self._done = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._done.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._done.set()
+        if self._thread:
+            self._thread.join()
+            self._thread = None
+        with print_lock:
+            self.clear()
+
+    def add(self, name, total):
+        """Register a transfer; the download loop updates task[0] in place"""
+        task = [0, total]
+        self.tasks[name] = task
+        return task
+
+    def remove(self, name):
+        self.tasks.pop(name, None)
+
+    def clear(self):
+        """Erase the progress line; caller holds print_lock"""
+        if self._width:
+            print("\r" + " " * self._width + "\r", end='', flush=True)
+            self._width = 0
+
+    def _run(self):
+        while not self._done.wait(self.interval):
+            parts = [
+                f"{name}: {100 * done / total:.1f}%" if total else f"{name}: {done / (1024 * 1024):.1f}MB"
+                for name, (done, total) in list(self.tasks.items())
+            ]
+            if not parts:
+                continue
+            # Never wider than the terminal: a wrapped line can't be erased with "\r"
+            width = shutil.get_terminal_size().columns - 1
+            line = ("   " + " | ".join(parts))[:width]
+            with print_lock:
+                self.clear()
+                print(line, end='', flush=True)
+                self._width = len(line)
+
+class ProgressReader:
+    """Wraps a readable stream and publishes bytes read to a ProgressBoard task"""
+
+    def __init__(self, stream, task):
+        self.stream = stream
+        self.task = task
+
+    def read(self, size=-1):
+        data = self.stream.read(size)
+        self.task[0] += len(data)
+        return data
+
+progress = ProgressBoard()
+
+def log(*args, **kwargs):
+    """Thread-safe print that doesn't collide with the progress line"""
+    with print_lock:
+        progress.clear()
+        print(*args, **kwargs)
+
+def model_filename(model_id, model_info):
+    """File name a model is stored under"""
+    return model_info.get("filename", f"{model_id}.onnx")
+
+def model_urls(model_info):
+    """Candidate URLs for a model, in the order they should be tried"""
+    return model_info.get("urls") or [model_info["url"]]
+
+def preallocate(fd, size):
+    """Reserve size bytes for fd up front so the file lands in one extent"""
+    if size and hasattr(os, "posix_fallocate"):  # Not available on macOS
+        try:
+            os.posix_fallocate(fd, 0, size)
+        except OSError:
+            pass  # Filesystem doesn't support it; fall back to growing on write
+
+def dump_json(data, sort_keys=False):
+    """Serialize to indented JSON bytes, with orjson when available"""
+    if HAS_ORJSON:
+        option = orjson.OPT_INDENT_2 | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        return orjson.dumps(data, option=option)
+    return json.dumps(data, indent=2, sort_keys=sort_keys).encode()
+
+def write_if_changed(path, data):
+    """Write bytes to path unless it already holds exactly them; returns True if written"""
+    path = Path(path)
+    try:
+        if path.read_bytes() == data:
+            return False  # Leave the mtime alone for file watchers and caches
+    except OSError:
+        pass
+    path.write_bytes(data)
+    return True
+
+def load_etags(out_dir):
+    """Read the cached filename -> {url, etag, sha256, size} mapping for out_dir"""
+    etags_file = Path(out_dir) / ETAGS_FILENAME
+    try:
+        with open(etags_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_etags(out_dir, etags):
+    """Persist the ETag cache for out_dir"""
+    (Path(out_dir) / ETAGS_FILENAME).write_bytes(dump_json(etags, sort_keys=True))
+
+def hash_file(path):
+    """SHA-256 hash object over an existing file's contents"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(block)
+    return h
+
+def is_up_to_date(url, filepath, cached=None, sha256=None):
+    """HEAD url and check the file on disk still matches it"""
+    try:
+        local_size = filepath.stat().st_size
+    except FileNotFoundError:
+        return False
+    if sha256 and (not cached or cached.get("sha256") != sha256):
+        return False
+
+    # The file on disk is decoded, so compare against the identity length
+    try:
+        response = SESSION.head(url, allow_redirects=True, timeout=10, headers={"Accept-Encoding": "identity"})
+        response.raise_for_status()
+    except Exception:
+        return False
+
+    remote_etag = response.headers.get('ETag')
+    if cached and cached.get("etag") and remote_etag and cached["etag"] != remote_etag:
+        return False
+
+    remote_size = int(response.headers.get('content-length', 0))
+    return remote_size > 0 and remote_size == local_size
+
+def _matches_record(filepath, cached, url, sha256=None):
+    """True if filepath is still the verified file recorded for url, so a 304 can be trusted"""
+    if not cached or cached.get("url") != url or not cached.get("etag") or not cached.get("sha256"):
+        return False
+    if sha256 and cached["sha256"] != sha256:
+        return False
+    try:
+        return filepath.stat().st_size == cached.get("size")
+    except FileNotFoundError:
+        return False
+
+def download_model(url, filepath, etags=None, max_attempts=MAX_ATTEMPTS, sha256=None):
+    """Download a single URL to filepath, checking its SHA-256 if one is given"""
+    filename = filepath.name
+    partpath = filepath.with_name(filename + ".part")
+    cached = etags.get(filename) if etags is not None else None
+    etag = None
+
+    log(f"📥 Downloading {filename} from {url}...")
+    for attempt in range(1, max_attempts + 1):
+        try:
+            # Resume from whatever a failed attempt left behind
+            try:
+                existing = partpath.stat().st_size
+            except FileNotFoundError:
+                existing = 0
+            headers = {}
+            if existing:
+                # Range offsets count encoded bytes, so resume uncompressed
+                headers["Range"] = f"bytes={existing}-"
+                headers["Accept-Encoding"] = "identity"
+                if etag:
+                    headers["If-Range"] = etag  # Restart if the file changed
+            elif _matches_record(filepath, cached, url, sha256):
+                headers["If-None-Match"] = cached["etag"]
+
+            response = SESSION.get(url, stream=True, timeout=30, headers=headers)
+            if response.status_code == 304:
+                log(f"✅ {filename} is up to date")
+                return True
+            if response.status_code == 416:
+                partpath.unlink()  # Stale partial file, start over
+                continue
+            response.raise_for_status()
+            etag = response.headers.get('ETag')
+
+            # 206 appends to the partial file; 200 means the server ignored Range
+            # The digest is computed as the bytes arrive, so verifying costs
+            # no second read of the file
+            if response.status_code == 206:
+                mode, downloaded = 'ab', existing
+                h = hash_file(partpath)
+            else:
+                mode, downloaded = 'wb', 0
+                h = hashlib.sha256()
+            total_size = downloaded + int(response.headers.get('content-length', 0))
+
+            with open(partpath, mode, buffering=CHUNK_SIZE) as f:
+                if mode == 'wb':
+                    preallocate(f.fileno(), total_size)
+                task = progress.add(filename, total_size)
+                try:
+                    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        h.update(chunk)
+                        downloaded += len(chunk)
+                        task[0] = downloaded  # Picked up by the progress thread
+                finally:
+                    progress.remove(filename)
+                    # Drop any reserved-but-unwritten tail so a retry resumes
+                    # from the bytes actually received
+                    f.truncate(downloaded)
+
+            digest = h.hexdigest()
+            if sha256 and digest != sha256:
+                partpath.unlink()
+                log(f"⚠️  Attempt {attempt}/{max_attempts} for {filename} failed: SHA-256 mismatch ({digest})")
+                continue
+            partpath.replace(filepath)
+            size_mb = downloaded / (1024 * 1024)
+            log(f"✅ Downloaded {filename} ({size_mb:.1f}MB)")
+            if etags is not None:
+                with etags_lock:
+                    etags[filename] = {"url": url, "etag": etag, "sha256": digest, "size": downloaded}
+            return True
+
+        except requests.HTTPError as e:
+            # Client errors won't go away on retry
+            if e.response is not None and 400 <= e.response.status_code < 500:
+                log(f"❌ Failed to download {filename} from {url}: {e}")
+                break
+            log(f"⚠️  Attempt {attempt}/{max_attempts} for {filename} failed: {e}")
+        except Exception as e:
+            log(f"⚠️  Attempt {attempt}/{max_attempts} for {filename} failed: {e}")
+
+    if partpath.exists():
+        partpath.unlink()  # Don't resume across different sources
+    return False
+
+def _probe(url):
+    """True if a HEAD to url succeeds"""
+    try:
+        return SESSION.head(url, allow_redirects=True, timeout=10).ok
+    except Exception:
+        return False
+
+def race_sources(urls):
+    """Yield urls in the order their HEAD requests succeed, then the ones that failed"""
+    if len(urls) < 2:
+        yield from urls
+        return
+
+    # Probe every source at once so a dead primary costs one timeout in
+    # parallel rather than a full failed download before the fallback
+    executor = ThreadPoolExecutor(max_workers=len(urls))
+    futures = {executor.submit(_probe, url): url for url in urls}
+    failed = set()
+    try:
+        for future in as_completed(futures):
+            if future.result():
+                yield futures[future]
+            else:
+                failed.add(futures[future])
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # Some servers refuse HEAD but serve GET, so these still get a try
+    yield from (url for url in urls if url in failed)
+
+def download_first(urls, filepath, etags=None, sha256=None):
+    """Try each URL, fastest responding first, until one downloads"""
+    cached = etags.get(filepath.name) if etags is not None else None
+    source = cached["url"] if cached and cached.get("url") in urls else urls[0]
+    if is_up_to_date(source, filepath, cached, sha256):
+        log(f"⏭️  {filepath.name} is up to date, skipping")
+        return True
+
+    for url in race_sources(urls):
+        if download_model(url, filepath, etags, sha256=sha256):
+            return True
+
+    log(f"❌ Could not download {filepath.name} from any source")
+    return False
+
+def download_many(models, out_dir, workers=MAX_CONCURRENT_DOWNLOADS):
+    """Download all models into out_dir concurrently; returns the success count"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    etags = load_etags(out_dir)
+
+    progress.start()
+    with ThreadPoolExecutor(max_workers=max(1, min(len(models), workers))) as executor:
+        futures = {
+            executor.submit(
+                download_first, model_urls(info), out_dir / model_filename(model_id, info), etags, info.get("sha256")
+            ): model_id
+            for model_id, info in models.items()
+        }
+        success_count = sum(future.result() for future in as_completed(futures))
+    progress.stop()
+
+    save_etags(out_dir, etags)
+    return success_count
+
+def verify_models(models, out_dir):
+    """Check downloaded models look valid; returns the ids that do"""
+    print(f"\n🔍 Verifying downloaded models...")
+
+    # Digests recorded at download time stand in for re-hashing each file
+    etags = load_etags(out_dir)
+    valid_models = []
+    for model_id, model_info in models.items():
+        filename = model_filename(model_id, model_info)
+        filepath = Path(out_dir) / filename
+        expected = model_info.get("sha256")
+
+        try:
+            size = filepath.stat().st_size
+        except FileNotFoundError:
+            print(f"❌ {filename}: Missing")
+            continue
+
+        size_mb = size / (1024 * 1024)
+        cached = etags.get(filename, {})
+        if cached.get("sha256") and cached.get("size") == size:
+            digest = cached["sha256"]
+        elif expected:
+            digest = hash_file(filepath).hexdigest()
+        else:
+            digest = None
+
+        if expected and digest != expected:
+            print(f"❌ {filename}: SHA-256 mismatch")
+        elif digest:
+            print(f"✅ {filename}: Valid ({size_mb:.1f}MB, sha256 {digest[:12]})")
+            valid_models.append(model_id)
+        elif size_mb > 1:  # Basic size check
+            print(f"✅ {filename}: Valid ({size_mb:.1f}MB)")
+            valid_models.append(model_id)
+        else:
+            print(f"⚠️  {filename}: Suspiciously small ({size_mb:.1f}MB)")
+
+    return valid_models
+
+def write_styles_json(models, path=Path("web/styles.json"), source="ONNX Model Zoo"):
+    """Write the web app's styles.json for the given models"""
+    styles_data = {
+        "styles": []
+    }
+
+    for model_id, model_info in models.items():
+        style_entry = {
+            "id": model_id,
+            "name": model_info["name"],
+            "size": model_info["size"],
+            "model_url": f"./models/{model_filename(model_id, model_info)}",
+            "input_name": "input",
+            "output_name": "output",
+            "input_width": 512,
+            "input_height": 512,
+            "mean": [0.485, 0.456, 0.406],
+            "std": [0.229, 0.224, 0.225],
+            "scale": 255.0,
+            "source": source,
+            "description": model_info["description"]
+        }
+        if "category" in model_info:
+            style_entry["category"] = model_info["category"]
+        styles_data["styles"].append(style_entry)
+
+    path = Path(path)
+    if write_if_changed(path, dump_json(styles_data)):  # One write(), not one per token
+        print(f"✅ Updated {path} with {len(styles_data['styles'])} model configurations")
+    else:
+        print(f"✅ {path} already up to date")
@@ -3,21 +3,27 @@
 Download working ONNX models from verified sources for Neural Style Transfer
 """
 
-import os
-import requests
-import json
 from pathlib import Path
 
-# Working ONNX models from verified sources
+import download_lib
+
+# Working ONNX models from verified sources; each model's URLs are tried in
+# order, with the Hugging Face ONNX model hub as a fallback where it has one
 WORKING_MODELS = {
     "starry_night": {
-        "url": "https://github.com/onnx/models/raw/main/Computer_Vision/fast_neural_style/starry_night.onnx",
+        "urls": [
+            "https://github.com/onnx/models/raw/main/Computer_Vision/fast_neural_style/starry_night.onnx",
+            "https://huggingface.co/onnx/fast-neural-style/resolve/main/starry_night.onnx"
+        ],
         "name": "Starry Night Style",
         "size": "6.7MB",
         "style": "Van Gogh Starry Night artistic style"
     },
     "mosaic": {
-        "url": "https://github.com/onnx/models/raw/main/Computer_Vision/fast_neural_style/mosaic.onnx",
+        "urls": [
+            "https://github.com/onnx/models/raw/main/Computer_Vision/fast_neural_style/mosaic.onnx",
+            "https://huggingface.co/onnx/fast-neural-style/resolve/main/mosaic.onnx"
+        ],
         "name": "Mosaic Style", 
         "size": "6.7MB",
         "style": "Mosaic artistic pattern"
@@ -42,63 +48,6 @@ WORKING_MODELS = {
     }
 }
 
-def download_model(url, filename, model_dir):
-    """Download a model from URL with progress tracking"""
-    try:
-        print(f"📥 Downloading {filename}...")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        filepath = model_dir / filename
-        total_size = int(response.headers.get('content-length', 0))
-        
-        with open(filepath, 'wb') as f:
-            downloaded = 0
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                downloaded += len(chunk)
-                if total_size > 0:
-                    percent = (downloaded / total_size) * 100
-                    print(f"\r   Progress: {percent:.1f}%", end='', flush=True)
-        
-        print()  # New line after progress
-        size_mb = filepath.stat().st_size / (1024 * 1024)
-        print(f"✅ Downloaded {filename} ({size_mb:.1f}MB)")
-        return True
-        
-    except Exception as e:
-        print(f"❌ Failed to download {filename}: {e}")
-        return False
-
-def download_from_huggingface():
-    """Download models from Hugging Face ONNX model hub"""
-    print("🔄 Trying alternative sources...")
-    
-    # Alternative URLs from Hugging Face and other sources
-    alternative_models = {
-        "starry_night": {
-            "url": "https://huggingface.co/onnx/fast-neural-style/resolve/main/starry_night.onnx",
-            "name": "Starry Night Style (Hugging Face)",
-            "size": "6.7MB"
-        },
-        "mosaic": {
-            "url": "https://huggingface.co/onnx/fast-neural-style/resolve/main/mosaic.onnx", 
-            "name": "Mosaic Style (Hugging Face)",
-            "size": "6.7MB"
-        }
-    }
-    
-    model_dir = Path("web/models")
-    model_dir.mkdir(exist_ok=True)
-    
-    success_count = 0
-    for model_id, model_info in alternative_models.items():
-        filename = f"{model_id}.onnx"
-        if download_model(model_info["url"], filename, model_dir):
-            success_count += 1
-    
-    return success_count, alternative_models
-
 def create_working_styles_json():
     """Create a working styles.json with models we can actually use"""
     styles_data = {
@@ -182,32 +131,20 @@ def create_working_styles_json():
     }
     
     styles_file = Path("web/styles.json")
-    with open(styles_file, 'w') as f:
-        json.dump(styles_data, f, indent=2)
-    
-    print(f"✅ Updated {styles_file} with working model configurations")
+    if download_lib.write_if_changed(styles_file, download_lib.dump_json(styles_data)):
+        print(f"✅ Updated {styles_file} with working model configurations")
+    else:
+        print(f"✅ {styles_file} already up to date")
 
 def main():
     """Main download function"""
     print("🚀 Downloading Working ONNX Models for Neural Style Transfer")
     print("=" * 60)
     
-    # First try the original ONNX Model Zoo URLs
+    # All models download concurrently, each falling back through its URLs
     print("📥 Attempting to download from ONNX Model Zoo...")
     model_dir = Path("web/models")
-    model_dir.mkdir(exist_ok=True)
-    
-    success_count = 0
-    for model_id, model_info in WORKING_MODELS.items():
-        filename = f"{model_id}.onnx"
-        if download_model(model_info["url"], filename, model_dir):
-            success_count += 1
-    
-    # If that fails, try alternative sources
-    if success_count == 0:
-        print(f"\n🔄 ONNX Model Zoo failed, trying alternative sources...")
-        alt_success, alt_models = download_from_huggingface()
-        success_count += alt_success
+    success_count = download_lib.download_many(WORKING_MODELS, model_dir)
     
     print(f"\n📊 Download Summary:")
     print(f"✅ Successfully downloaded: {success_count} models")
@@ -2,19 +2,25 @@
 """
 TensorFlow to ONNX converter for style transfer models.
 Usage: python export_to_onnx.py --model_path /path/to/saved_model --output_path model.onnx
+       python export_to_onnx.py --model_path a b --output_path a.onnx b.onnx --workers 2
 """
 
 import argparse
-import tensorflow as tf
-import tf2onnx
+import multiprocessing
 import os
+from concurrent.futures import ProcessPoolExecutor
 
-def convert_to_onnx(model_path, output_path, input_shape=(256, 256, 3)):
-    """Convert TensorFlow SavedModel to ONNX format."""
+# Loaded models by path, so converting one model at several input sizes
+# only pays for tf.saved_model.load once per process
+_MODEL_CACHE = {}
+
+def _load_model(model_path):
+    """Load a SavedModel or Keras model and return its concrete function, cached by path"""
+    if model_path in _MODEL_CACHE:
+        return _MODEL_CACHE[model_path][1]
     
-    print(f"Loading model from: {model_path}")
+    import tensorflow as tf
     
-    # Load the SavedModel
     if os.path.isdir(model_path):
         model = tf.saved_model.load(model_path)
         # If it's a SavedModel, we need to get the concrete function
@@ -27,6 +33,20 @@ def convert_to_onnx(model_path, output_path, input_shape=(256, 256, 3)):
         model = tf.keras.models.load_model(model_path)
         concrete_func = model
     
+    # Keep the loaded object too: a signature doesn't hold its variables alive
+    _MODEL_CACHE[model_path] = (model, concrete_func)
+    return concrete_func
+
+def convert_to_onnx(model_path, output_path, input_shape=(256, 256, 3)):
+    """Convert TensorFlow SavedModel to ONNX format."""
+    # Imported here: TensorFlow takes seconds and hundreds of MB to load,
+    # which --help and argument errors shouldn't pay for
+    import tensorflow as tf
+    import tf2onnx
+    
+    print(f"Loading model from: {model_path}")
+    concrete_func = _load_model(model_path)
+    
     print(f"Model loaded successfully")
     print(f"Input shape: {input_shape}")
     
@@ -40,24 +60,52 @@ def convert_to_onnx(model_path, output_path, input_shape=(256, 256, 3)):
     )
     
     print(f"ONNX model saved to: {output_path}")
-    print(f"Model size: {os.path.getsize(output_path) / (1024*1024):.2f} MB")
+    # The serialized size is what was just written; no need to stat the file
+    print(f"Model size: {onnx_model.ByteSize() / (1024*1024):.2f} MB")
     
     return onnx_model
 
+def _convert_job(job):
+    """Worker for convert_many; returns the output path"""
+    model_path, output_path, input_shape = job
+    convert_to_onnx(model_path, output_path, input_shape)
+    return output_path
+
+def convert_many(jobs, workers=1):
+    """Convert a list of (model_path, output_path, input_shape) jobs.
+    
+    With workers=1 everything runs in this process, sharing one TensorFlow
+    import and model cache. Larger values run one conversion per process,
+    since graph conversion is CPU-bound.
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        return [_convert_job(job) for job in jobs]
+    
+    # TensorFlow isn't fork-safe once initialised, so start clean workers
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        return list(executor.map(_convert_job, jobs))
+
 def main():
     parser = argparse.ArgumentParser(description='Convert TensorFlow model to ONNX')
-    parser.add_argument('--model_path', required=True, help='Path to TensorFlow SavedModel or Keras model')
-    parser.add_argument('--output_path', required=True, help='Output ONNX file path')
+    parser.add_argument('--model_path', required=True, nargs='+', help='Path(s) to TensorFlow SavedModel or Keras model')
+    parser.add_argument('--output_path', required=True, nargs='+', help='Output ONNX file path(s), one per model')
     parser.add_argument('--input_width', type=int, default=256, help='Input width')
     parser.add_argument('--input_height', type=int, default=256, help='Input height')
     parser.add_argument('--input_channels', type=int, default=3, help='Input channels')
+    parser.add_argument('--workers', type=int, default=1, help='Parallel conversion processes')
     
     args = parser.parse_args()
+    if len(args.model_path) != len(args.output_path):
+        parser.error('--model_path and --output_path need the same number of entries')
+    missing = [path for path in args.model_path if not os.path.exists(path)]
+    if missing:
+        parser.error(f"model not found: {', '.join(missing)}")
     
     input_shape = (args.input_height, args.input_width, args.input_channels)
+    jobs = [(model_path, output_path, input_shape) for model_path, output_path in zip(args.model_path, args.output_path)]
     
     try:
-        convert_to_onnx(args.model_path, args.output_path, input_shape)
+        convert_many(jobs, args.workers)
         print("Conversion completed successfully!")
     except Exception as e:
         print(f"Conversion failed: {e}")
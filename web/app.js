@@ -258,6 +258,142 @@ const STYLE_MODELS = [
     }
 ];
 
+// SHA-256 of each model file (same values as scripts/benchmark_config.json);
+// update these whenever a file under web/models is replaced
+const MODEL_SHA256 = {
+    './models/mosaic-9.onnx': 'fa646dedade881243f8d5a2ceb7de2b93675b21fc24f7482894ac4851a9a0a47',
+    './models/pointilism-9.onnx': '5ee2b8d4d6bc60a777f54e0fe96a1b717360a004b79d56c67390d4a975b14d98',
+    './models/candy-9.onnx': '9d11a3529d1e547da6ae07201d93484dbab2ec0a3614535752c8f40f0fe2968a',
+    './models/udnie-9.onnx': '8656b6ce7dec8f22ee13c2d557d6b67bd6f550dde88d0f2e7c9972aeb765cc0d',
+    './models/rain-princess-9.onnx': '4162912e6f75fedef6f810ae989b9e10d3d5d43308dab34b027c850cf255e152'
+};
+
+// IndexedDB cache for downloaded model files, so reloads skip the network.
+// Bump MODEL_CACHE_VERSION to drop every stored entry at once: opening the
+// database at a new version clears the store.
+const MODEL_CACHE_DB = 'styleTransferCache';
+const MODEL_CACHE_STORE = 'models';
+const MODEL_CACHE_VERSION = 2;
+
+function idbRequest(request) {
+    return new Promise((resolve, reject) => {
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+// One shared connection per page. It is closed when another tab upgrades the
+// database, and an upgrade blocked by an older tab rejects instead of hanging,
+// so fetchModelBuffer falls back to the network either way.
+let modelCachePromise = null;
+
+function openModelCache() {
+    if (!modelCachePromise) {
+        const request = indexedDB.open(MODEL_CACHE_DB, MODEL_CACHE_VERSION);
+        request.onupgradeneeded = () => {
+            const db = request.result;
+            if (db.objectStoreNames.contains(MODEL_CACHE_STORE)) {
+                db.deleteObjectStore(MODEL_CACHE_STORE);
+            }
+            db.createObjectStore(MODEL_CACHE_STORE);
+        };
+        modelCachePromise = new Promise((resolve, reject) => {
+            request.onsuccess = () => {
+                const db = request.result;
+                db.onversionchange = () => {
+                    db.close();
+                    modelCachePromise = null;
+                };
+                resolve(db);
+            };
+            request.onerror = () => reject(request.error);
+            request.onblocked = () => reject(new Error('Model cache upgrade blocked by another tab'));
+        }).catch(error => {
+            modelCachePromise = null;
+            throw error;
+        });
+    }
+    return modelCachePromise;
+}
+
+async function sha256Hex(buffer) {
+    return Array.from(
+        new Uint8Array(await crypto.subtle.digest('SHA-256', buffer)),
+        byte => byte.toString(16).padStart(2, '0')
+    ).join('');
+}
+
+// Entries are keyed by URL plus the expected digest (or the cache version when
+// no digest is known), so a model replaced at the same URL is never served stale
+async function fetchModelBuffer(url, expectedSha256) {
+    const key = `${url}#${expectedSha256 || `v${MODEL_CACHE_VERSION}`}`;
+    let db = null;
+    try {
+        db = await openModelCache();
+        const cached = await idbRequest(
+            db.transaction(MODEL_CACHE_STORE).objectStore(MODEL_CACHE_STORE).get(key)
+        );
+        if (cached) {
+            return cached;
+        }
+    } catch (error) {
+        console.warn('Model cache unavailable:', error);
+    }
+
+    const response = await fetch(url);
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+
+    const buffer = await response.arrayBuffer();
+    if (expectedSha256 && await sha256Hex(buffer) !== expectedSha256) {
+        throw new Error(`SHA-256 mismatch for ${url}`);
+    }
+    if (db) {
+        try {
+            await idbRequest(
+                db.transaction(MODEL_CACHE_STORE, 'readwrite').objectStore(MODEL_CACHE_STORE).put(buffer, key)
+            );
+        } catch (error) {
+            console.warn('Failed to cache model:', error);
+        }
+    }
+    return buffer;
+}
+
+// Instrumented model load for scripts/benchmark.py: times network, integrity
+// check and session creation separately
+window.__benchLoadModel = async (url, expectedSha256) => {
+    const fetchStart = performance.now();
+    const response = await fetch(url, { cache: 'force-cache' });
+    if (!response.ok) {
+        throw new Error(`HTTP ${response.status}`);
+    }
+    const buffer = await response.arrayBuffer();
+
+    const hashStart = performance.now();
+    const digest = await sha256Hex(buffer);
+    if (expectedSha256 && digest !== expectedSha256) {
+        throw new Error(`SHA-256 mismatch for ${url}`);
+    }
+
+    const compileStart = performance.now();
+    const session = await window.ort.InferenceSession.create(buffer, {
+        executionProviders: navigator.gpu ? ['webgpu', 'wasm'] : ['wasm'],
+        graphOptimizationLevel: 'all'
+    });
+    const compileEnd = performance.now();
+
+    // Don't leave timing-only sessions around to skew later memory readings
+    await session.release();
+
+    return {
+        fetchMs: hashStart - fetchStart,
+        hashMs: compileStart - hashStart,
+        compileMs: compileEnd - compileStart
+    };
+};
+
 class StyleTransferApp {
     constructor() {
         this.currentCategory = 'all';
@@ -328,6 +464,10 @@ class StyleTransferApp {
             this.updateStatus(`Ready! ${STYLE_MODELS.length} artistic styles available`, 'ready');
             console.log('Initialization complete!');
 
+            // Exact ready timestamp for scripts/benchmark.py
+            window.__readyAt = performance.now();
+            window.dispatchEvent(new CustomEvent('benchReady', { detail: window.__readyAt }));
+
         } catch (error) {
             console.error('Initialization failed:', error);
             console.error('Error stack:', error.stack);
@@ -605,16 +745,12 @@ class StyleTransferApp {
                 this.updateModelInfo(model);
                 this.updateStatus(`${model.displayName} ready!`, 'ready');
                 this.enableStylizeButton();
+                window.dispatchEvent(new CustomEvent('benchModelReady', { detail: performance.now() }));
                 return;
             }
 
-            // Download model
-            const response = await fetch(model.url);
-            if (!response.ok) {
-                throw new Error(`HTTP ${response.status}`);
-            }
-
-            const modelArrayBuffer = await response.arrayBuffer();
+            // Download model (or read it back from IndexedDB)
+            const modelArrayBuffer = await fetchModelBuffer(model.url, MODEL_SHA256[model.url]);
 
             // Create ONNX session
             const providers = [];
@@ -638,6 +774,7 @@ class StyleTransferApp {
             this.updateModelInfo(model);
             this.updateStatus(`${model.displayName} loaded!`, 'ready');
             this.enableStylizeButton();
+            window.dispatchEvent(new CustomEvent('benchModelReady', { detail: performance.now() }));
 
         } catch (error) {
             console.error('Model loading failed:', error);